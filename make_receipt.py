@@ -1,20 +1,22 @@
+import functools
 import io
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Tuple, Optional
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping, Tuple, Optional
 
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.units import mm
-from pypdf import PdfReader, PdfWriter
+# reportlab・pikepdfは読み込みに時間がかかるため、初回使用時にimportする
+if TYPE_CHECKING:
+    import pikepdf
+    from reportlab.pdfbase.ttfonts import TTFont
 
 # --- 設定・定数 ---
 FONT_PATH = Path("C:/Windows/Fonts/msgothic.ttc")
 FONT_NAME = "JapaneseFont"
-TAX_RATE = 0.10
+TAX_RATE_PERCENT = 10  # 消費税率 (%)
+MM = 72 / 25.4  # 1mmあたりのポイント数 (reportlab.lib.units.mm と同値)
+PAGE_WIDTH_MM = 210  # 用紙の幅 (A4)
 
 # レイアウト設定 (x, y, font_size)
 # original: 本紙, copy: 控え
@@ -37,7 +39,80 @@ LAYOUT_CONFIG: Dict[str, Dict[str, Tuple[float, float, int]]] = {
     }
 }
 
-@dataclass
+# 描画するセクション (本紙, 控え)
+_SECTIONS = ("original", "copy")
+
+# LAYOUT_CONFIGをPDFポイント単位に変換した描画順リスト (key, x_pt, y_pt, font_size)
+LAYOUT_POINTS: Tuple[Tuple[str, float, float, int], ...] = tuple(
+    (key, x * MM, y * MM, size)
+    for section in _SECTIONS
+    for key, (x, y, size) in LAYOUT_CONFIG[section].items()
+)
+
+# フォントサイズごとにまとめた描画リスト (setFontの呼び出しをサイズ数分に抑える)
+LAYOUT_BY_SIZE: List[Tuple[int, List[Tuple[str, float, float]]]] = [
+    (size, [(key, x_pt, y_pt) for key, x_pt, y_pt, s in LAYOUT_POINTS if s == size])
+    for size in sorted({size for _, _, _, size in LAYOUT_POINTS})
+]
+
+# オーバーレイの描画範囲 (x0, y0, x1, y1)。A4全面ではなく記載位置を囲む範囲だけのページにする
+# 文字は基準点から右上へ伸びるため、右端はページ幅まで、上下は最大フォントサイズ分の余白を取る
+_OVERLAY_PAD = max(size for _, _, _, size in LAYOUT_POINTS)
+OVERLAY_BBOX: Tuple[float, float, float, float] = (
+    min(x_pt for _, x_pt, _, _ in LAYOUT_POINTS),
+    min(y_pt for _, _, y_pt, _ in LAYOUT_POINTS) - _OVERLAY_PAD,
+    PAGE_WIDTH_MM * MM,
+    max(y_pt for _, _, y_pt, _ in LAYOUT_POINTS) + _OVERLAY_PAD,
+)
+
+# 読み込み済みTTFontのキャッシュ (キー: フォントファイルのパス)
+_FONT_CACHE: Dict[str, "TTFont"] = {}
+
+def _ensure_font() -> bool:
+    """フォントの登録処理 (初回呼び出し時のみTTCを読み込む)"""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    if FONT_NAME in pdfmetrics.getRegisteredFontNames():
+        return True
+    if not FONT_PATH.exists():
+        print(f"警告: フォントファイルが見つかりません: {FONT_PATH}")
+        return False
+    try:
+        font = _FONT_CACHE.get(str(FONT_PATH))
+        if font is None:
+            font = _FONT_CACHE[str(FONT_PATH)] = TTFont(FONT_NAME, str(FONT_PATH))
+        pdfmetrics.registerFont(font)
+        return True
+    except Exception as e:
+        print(f"フォント登録エラー: {e}")
+        return False
+
+@functools.lru_cache(maxsize=1)
+def _render_overlay(draw_items: Tuple[Tuple[str, str], ...]) -> bytes:
+    """オーバーレイPDFを描画してバイト列で返す (直前と同じ内容なら再描画しない)"""
+    from reportlab.pdfgen import canvas
+
+    items_by_key = dict(draw_items)
+    buffer = io.BytesIO()
+    x0, y0, x1, y1 = OVERLAY_BBOX
+    # 一時的なオーバーレイなので圧縮しない (保存時にpikepdfが圧縮する)
+    c = canvas.Canvas(buffer, pagesize=(x1 - x0, y1 - y0), pageCompression=0)
+    c.translate(-x0, -y0)
+
+    # 本紙と控えを描画
+    for size, items in LAYOUT_BY_SIZE:
+        draws = [(x_pt, y_pt, val) for key, x_pt, y_pt in items if (val := items_by_key.get(key))]
+        if not draws:
+            continue
+        c.setFont(FONT_NAME, size)
+        for x_pt, y_pt, val in draws:
+            c.drawString(x_pt, y_pt, val)
+
+    c.save()
+    return buffer.getvalue()
+
+@dataclass(frozen=True)
 class ReceiptData:
     """領収書データを管理するデータクラス"""
     date: str
@@ -47,67 +122,61 @@ class ReceiptData:
 
     @property
     def tax_amount(self) -> int:
-        """消費税額を計算"""
-        return int(self.amount_tax_excluded * TAX_RATE)
+        """消費税額を計算 (1円未満切り捨て、整数演算のみ)"""
+        return self.amount_tax_excluded * TAX_RATE_PERCENT // 100
 
     @property
     def total_amount(self) -> int:
         """税込合計金額を計算"""
         return self.amount_tax_excluded + self.tax_amount
 
-    def get_formatted_data(self) -> Dict[str, str]:
-        """描画用に整形されたデータを返す"""
-        return {
+    @functools.cached_property
+    def _formatted_data(self) -> Mapping[str, str]:
+        """描画用データ (初回アクセス時に一度だけ整形し、読み取り専用で保持)"""
+        amount = self.amount_tax_excluded
+        tax = self.tax_amount
+        return MappingProxyType({
             "date": self.date,
             "name": self.name,
-            "amount": f"¥{self.total_amount:,}-",
-            "tax": f"¥{self.tax_amount:,}",
-            "breakdown": f"¥{self.amount_tax_excluded:,}",
+            "amount": f"¥{amount + tax:,}-",
+            "tax": f"¥{tax:,}",
+            "breakdown": f"¥{amount:,}",
             "description": self.description
-        }
+        })
+
+    def get_formatted_data(self) -> Mapping[str, str]:
+        """描画用に整形されたデータを返す (読み取り専用)"""
+        return self._formatted_data
 
 class ReceiptGenerator:
     """PDF領収書生成クラス"""
 
     def __init__(self, template_path: str):
         self.template_path = Path(template_path)
-        self._register_font()
+        self._template_bytes = self.template_path.read_bytes() if self.template_path.exists() else None
+        self._template: Optional["pikepdf.Pdf"] = None
 
-    def _register_font(self) -> bool:
-        """フォントの登録処理"""
-        if not FONT_PATH.exists():
-            print(f"警告: フォントファイルが見つかりません: {FONT_PATH}")
-            return False
-        try:
-            pdfmetrics.registerFont(TTFont(FONT_NAME, str(FONT_PATH)))
-            return True
-        except Exception as e:
-            print(f"フォント登録エラー: {e}")
-            return False
+    def _get_template_page(self) -> "pikepdf.Page":
+        """解析済みテンプレートの1ページ目を返す (解析は初回のみ)"""
+        import pikepdf
+
+        if self._template is None:
+            self._template = pikepdf.Pdf.open(io.BytesIO(self._template_bytes))
+        return self._template.pages[0]
 
     def _create_overlay(self, data: ReceiptData) -> Optional[io.BytesIO]:
         """データが記載されたオーバーレイPDF（メモリ上）を作成"""
-        buffer = io.BytesIO()
-        c = canvas.Canvas(buffer, pagesize=A4)
-        
+        _ensure_font()
+
         # 描画用データの取得
         draw_items = data.get_formatted_data()
-
-        # 本紙と控えを描画
-        for section in ["original", "copy"]:
-            config = LAYOUT_CONFIG[section]
-            for key, (x, y, size) in config.items():
-                if key in draw_items:
-                    c.setFont(FONT_NAME, size)
-                    c.drawString(x * mm, y * mm, draw_items[key])
-
-        c.save()
-        buffer.seek(0)
-        return buffer
+        return io.BytesIO(_render_overlay(tuple(draw_items.items())))
 
     def generate(self, output_path: str, data: ReceiptData) -> bool:
         """テンプレートと合成してPDFを保存"""
-        if not self.template_path.exists():
+        import pikepdf
+
+        if self._template_bytes is None:
             raise FileNotFoundError(f"テンプレートが見つかりません: {self.template_path}")
 
         overlay_pdf = self._create_overlay(data)
@@ -115,25 +184,31 @@ class ReceiptGenerator:
             return False
 
         try:
-            # テンプレート読み込み
-            reader = PdfReader(self.template_path)
-            writer = PdfWriter()
-
-            # 1ページ目に合成
-            page = reader.pages[0]
-            overlay_reader = PdfReader(overlay_pdf)
-            page.merge_page(overlay_reader.pages[0])
-            writer.add_page(page)
-
-            # 保存
-            with open(output_path, "wb") as f:
-                writer.write(f)
+            # テンプレートの1ページ目を複製して合成 (元のテンプレートは変更しない)
+            # add_overlayはテンプレートの描画内容を複製しない
+            with pikepdf.Pdf.new() as base, pikepdf.Pdf.open(overlay_pdf) as overlay:
+                base.pages.append(self._get_template_page())
+                base.pages[0].add_overlay(overlay.pages[0], pikepdf.Rectangle(*OVERLAY_BBOX))
+
+                # 保存 (既存のストリームは再エンコードせずそのまま書き出し、
+                # 無圧縮のオーバーレイ分のみ圧縮する)
+                base.save(
+                    output_path,
+                    compress_streams=True,
+                    stream_decode_level=pikepdf.StreamDecodeLevel.none,
+                    normalize_content=False,
+                )
             return True
 
         except Exception as e:
             print(f"PDF保存エラー: {e}")
             raise e
 
+    def generate_many(self, jobs: Iterable[Tuple[str, ReceiptData]]) -> None:
+        """(保存先, データ) の組をまとめてPDF保存 (テンプレートの解析は1回のみ)"""
+        for output_path, data in jobs:
+            self.generate(output_path, data)
+
 if __name__ == "__main__":
     # テスト実行用
     test_data = ReceiptData(
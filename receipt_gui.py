@@ -1,11 +1,17 @@
 import TkEasyGUI as eg
 import datetime
+import time
+import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
 from make_receipt import ReceiptGenerator, ReceiptData
 
 # --- GUI設定 ---
 WINDOW_TITLE = "領収書作成ツール"
 TEMPLATE_FILE = "receipt_template.pdf"
+AMOUNT_FORMAT_DELAY_MS = 50  # 金額入力のカンマ整形を待つ時間 (連続入力をまとめる)
+GENERATE_POLL_MS = 50  # PDF生成の完了を確認する間隔
+PROGRESS_DELAY_MS = 300  # この時間内に生成が終われば「生成中…」を表示しない
 
 # スタイル定義
 STYLES = {
@@ -18,7 +24,9 @@ STYLES = {
 class ReceiptApp:
     def __init__(self):
         self.generator = ReceiptGenerator(TEMPLATE_FILE)
+        self.executor = ThreadPoolExecutor(max_workers=1)
         self.window = self._build_window()
+        self._amount_after: str | None = None
 
     def _build_window(self) -> eg.Window:
         """ウィンドウのレイアウト構築"""
@@ -55,16 +63,34 @@ class ReceiptApp:
         ]
         return eg.Window(WINDOW_TITLE, layout, size=(550, 350))
 
+    def _schedule_currency_format(self) -> None:
+        """金額のカンマ整形を遅延実行 (入力が続く間は予約し直す)"""
+        tk_window = self.window.window
+        if self._amount_after is not None:
+            tk_window.after_cancel(self._amount_after)
+        self._amount_after = tk_window.after(
+            AMOUNT_FORMAT_DELAY_MS, self.window.post_event, "-FORMAT-AMOUNT-", {}
+        )
+
     def _format_currency_input(self, raw_text: str) -> None:
         """金額入力時に3桁区切りカンマを自動挿入"""
         if not raw_text:
             return
 
-        clean_text = raw_text.replace(",", "")
-        if clean_text.isnumeric():
-            formatted = "{:,}".format(int(clean_text))
-            if raw_text != formatted:
-                self.window["amount"].update(formatted)
+        # 全角数字・全角カンマを半角に揃えてから区切り直す
+        clean_text = unicodedata.normalize("NFKC", raw_text).replace(",", "")
+        if not (clean_text.isascii() and clean_text.isdigit()):
+            return
+
+        # int変換を介さず、文字列のまま先頭から3桁ごとに区切る
+        clean_text = clean_text.lstrip("0") or "0"
+        n = len(clean_text)
+        first = n % 3 or 3
+        parts = [clean_text[:first]]
+        parts += [clean_text[i:i + 3] for i in range(first, n, 3)]
+        formatted = ",".join(parts)
+        if raw_text != formatted:
+            self.window["amount"].update(formatted)
 
     def _get_validated_data(self, values: dict) -> ReceiptData | None:
         """入力値の検証とデータクラスへの変換"""
@@ -101,8 +127,24 @@ class ReceiptApp:
         if not save_path:
             return
 
+        # PDF生成前に既存ファイルへ書き込み可能か確認 (閲覧ソフトで開かれている場合など)
+        if Path(save_path).exists():
+            try:
+                with open(save_path, "ab"):
+                    pass
+            except PermissionError:
+                eg.popup_error("ファイルが開かれているため保存できません。", title="エラー")
+                return
+            except OSError as e:
+                eg.popup_error(f"保存先に書き込めません:\n{e}", title="エラー")
+                return
+
+        # PDF生成はバックグラウンドで実行し、完了まで画面の描画を続ける
+        future = self.executor.submit(self.generator.generate, save_path, data)
+        self._wait_for(future)
+
         try:
-            self.generator.generate(save_path, data)
+            future.result()
             eg.popup(f"作成完了しました。\n{save_path}", title="成功")
         except FileNotFoundError:
             eg.popup_error(f"テンプレートファイル({TEMPLATE_FILE})が見つかりません。", title="エラー")
@@ -111,6 +153,23 @@ class ReceiptApp:
         except Exception as e:
             eg.popup_error(f"予期せぬエラーが発生しました:\n{e}", title="エラー")
 
+    def _wait_for(self, future: Future) -> None:
+        """「生成中…」を表示し、処理が終わるまでGUIを更新しながら待機"""
+        # すぐに終わる場合は進捗ウィンドウを出さない (一瞬だけ表示されるのを防ぐ)
+        wait([future], timeout=PROGRESS_DELAY_MS / 1000)
+        if future.done():
+            return
+
+        progress = eg.Window("処理中", [[eg.Text("生成中…", font=STYLES["label"]["font"])]])
+        self.window["-CREATE-"].set_disabled(True)
+        try:
+            while not future.done():
+                progress.refresh()
+                time.sleep(GENERATE_POLL_MS / 1000)
+        finally:
+            progress.close()
+            self.window["-CREATE-"].set_disabled(False)
+
     def run(self):
         """メインループ"""
         while True:
@@ -120,7 +179,11 @@ class ReceiptApp:
                 break
 
             if event == "amount":
-                self._format_currency_input(values["amount"])
+                self._schedule_currency_format()
+
+            if event == "-FORMAT-AMOUNT-":
+                self._amount_after = None
+                self._format_currency_input(self.window["amount"].get())
 
             if event == "-CREATE-":
                 valid_data = self._get_validated_data(values)
@@ -128,6 +191,7 @@ class ReceiptApp:
                     self._save_pdf(valid_data)
 
         self.window.close()
+        self.executor.shutdown()
 
 if __name__ == "__main__":
     import os